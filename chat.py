@@ -5,14 +5,23 @@ Usage:
     python chat.py
 """
 
+import functools
+import hashlib
+import math
+import operator
 import os
+import time
+from collections import OrderedDict
 
+import httpx
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessageChunk
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain.agents import create_agent
 
+from tools.course_data import CACHE_TTL
 from tools.course_search import search_courses_by_code, search_courses_by_title, get_course_sections
-from tools.rmp_search import search_professor_rating, get_professor_reviews
+from tools.rmp_search import search_professor_rating, search_professor_ratings, get_professor_reviews
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -20,12 +29,19 @@ from tools.rmp_search import search_professor_rating, get_professor_reviews
 
 load_dotenv()  # loads .env into os.environ
 
+# One pooled HTTP client (sync + async) shared by every OpenAI call in the
+# process -- agent, summarizer and embeddings -- so connections stay warm
+# instead of each ChatOpenAI/OpenAIEmbeddings opening its own pool.
+_HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+_HTTP_CLIENT = httpx.Client(limits=_HTTP_LIMITS)
+_ASYNC_HTTP_CLIENT = httpx.AsyncClient(limits=_HTTP_LIMITS)
+
 SYSTEM_PROMPT = """\
 You are a friendly and knowledgeable course assistant for University of Florida \
 (UF) students. Your job is to help students explore the UF course catalog for \
 the current semester (Spring 2026).
 
-You have access to four tools:
+You have access to six tools:
 1. **search_courses_by_code** -- search for courses by course code or \
 department prefix (e.g. "COP3530", "COP", "MAC 2311"). Use this when the \
 student mentions a specific course code.
@@ -41,6 +57,9 @@ name as it appears in course section data (e.g. "Amanpreet Kapoor").
 5. **get_professor_reviews** -- get the most recent student reviews for a \
 professor. Use this when the student wants detailed recent feedback, multiple \
 reviews, or wants to know what current students are saying.
+6. **search_professor_ratings** -- look up ratings for up to five professors \
+in a single request. Use this instead of several search_professor_rating \
+calls when comparing professors.
 
 Guidelines:
 - When a student asks about a course, search for it first, then retrieve \
@@ -49,7 +68,11 @@ section details if they need specifics like times, instructors, or locations.
 search_professor_rating for a quick overview. Use get_professor_reviews if \
 they want more detail or recent reviews.
 - When a student is deciding between sections, you can proactively look up \
-professor ratings to help them choose.
+professor ratings to help them choose (search_professor_ratings fetches all \
+of the instructors at once).
+- When several lookups don't depend on each other (e.g. two different \
+courses), request all of those tool calls in the \
+same step rather than one at a time -- they run in parallel.
 - Present information clearly and concisely. Summarize key details rather \
 than dumping raw data.
 - If a course code has multiple listings (e.g. Special Topics with different \
@@ -61,17 +84,34 @@ gen-ed requirements, Quest designations, etc.
 - Be concise but thorough. Students are busy -- get to the point.\
 """
 
+# SYSTEM_PROMPT is sent verbatim as the first message of every request, so
+# OpenAI's automatic prefix caching can reuse it across turns.  Keep it
+# static -- per-turn data belongs in the user message, not interpolated here.
+# The cache key routes this app's requests to the same prompt cache.
+PROMPT_CACHE_KEY = "uf-course-assistant"
+
 # ---------------------------------------------------------------------------
 # Agent setup
 # ---------------------------------------------------------------------------
 
-def build_agent():
+@functools.lru_cache(maxsize=4)
+def build_agent(model: str = "gpt-4o-mini"):
+    """Build (once per model) the tool-calling agent.
+
+    Cached so repeat callers (e.g. a web handler) reuse one ChatOpenAI
+    client and compiled agent graph instead of rebuilding them per request.
+    """
     llm = ChatOpenAI(
-        model="gpt-4o-mini",
+        model=model,
         api_key=os.environ.get("OPENAI_API_KEY"),
+        http_client=_HTTP_CLIENT,
+        http_async_client=_ASYNC_HTTP_CLIENT,
+        model_kwargs={"prompt_cache_key": PROMPT_CACHE_KEY},
     )
 
-    tools = [search_courses_by_code, search_courses_by_title, get_course_sections, search_professor_rating, get_professor_reviews]
+    # Tool calls emitted in the same model step run concurrently on the
+    # agent's ToolNode thread pool, so the tools must stay thread-safe.
+    tools = [search_courses_by_code, search_courses_by_title, get_course_sections, search_professor_rating, search_professor_ratings, get_professor_reviews]
 
     agent = create_agent(
         model=llm,
@@ -82,14 +122,178 @@ def build_agent():
     return agent
 
 
+# ---------------------------------------------------------------------------
+# History compaction
+# ---------------------------------------------------------------------------
+
+# Once the transcript passes _HISTORY_MAX_MESSAGES, everything but the last
+# _HISTORY_KEEP_MESSAGES is folded into one summary message, so per-turn
+# input tokens stay bounded instead of growing with session length.
+_HISTORY_MAX_MESSAGES = 20
+_HISTORY_KEEP_MESSAGES = 10
+
+SUMMARY_PROMPT = """\
+Summarize this conversation between a UF student and a course assistant in a \
+few sentences. Keep course codes, section numbers, professor names, and any \
+preferences or constraints the student mentioned.\
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _summarizer():
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        http_client=_HTTP_CLIENT,
+        http_async_client=_ASYNC_HTTP_CLIENT,
+    )
+
+
+def compact_history(history: list[dict]) -> list[dict]:
+    """Return *history*, summarizing older messages if it has grown too long.
+
+    On a summarization failure the history is returned unchanged and
+    compaction is retried on the next turn.
+    """
+    if len(history) <= _HISTORY_MAX_MESSAGES:
+        return history
+
+    older = history[:-_HISTORY_KEEP_MESSAGES]
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in older)
+    try:
+        summary = _summarizer().invoke([
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript},
+        ]).text
+    except Exception:
+        return history
+
+    summary_message = {"role": "system", "content": f"Summary so far: {summary}"}
+    return [summary_message] + history[-_HISTORY_KEEP_MESSAGES:]
+
+
+# ---------------------------------------------------------------------------
+# Semantic response cache
+# ---------------------------------------------------------------------------
+
+# Near-identical questions (e.g. "COP3530 professors?" asked twice) reuse the
+# previous answer instead of re-running the full LLM + tool loop.  Keys are
+# the normalized question alone, so the cache is only used for a
+# conversation's opening question: follow-ups like "what about section 2?"
+# depend on earlier turns.  Typing "new" starts another conversation, whose
+# opener can hit or fill the cache.  Entries expire with the course data
+# they were built from.
+_CACHE_MAX_ENTRIES = 500
+_CACHE_SIMILARITY = 0.93
+
+# sha1(key text) -> (unit-length embedding or None, assistant text, timestamp)
+_response_cache: OrderedDict[str, tuple[list[float] | None, str, float]] = OrderedDict()
+_embeddings = None
+
+
+def _cache_key_text(user_input: str) -> str:
+    """Normalize a question into a cache key string."""
+    return " ".join(user_input.lower().split())
+
+
+def _embed(text: str) -> list[float] | None:
+    """Return a unit-length embedding for *text*, or None if embedding fails."""
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = OpenAIEmbeddings(
+            model="text-embedding-3-small",
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            http_client=_HTTP_CLIENT,
+            http_async_client=_ASYNC_HTTP_CLIENT,
+        )
+    try:
+        vec = _embeddings.embed_query(text)
+    except Exception:
+        return None
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def semantic_get(key_text: str) -> tuple[str | None, list[float] | None]:
+    """Look up a cached answer for *key_text*.
+
+    Returns ``(answer, embedding)``; *answer* is None on a miss, and the
+    embedding (if one was computed) can be handed to :func:`semantic_put`.
+    """
+    now = time.time()
+    for key in [k for k, (_, _, ts) in _response_cache.items() if now - ts >= CACHE_TTL]:
+        del _response_cache[key]
+
+    exact = _response_cache.get(hashlib.sha1(key_text.encode()).hexdigest())
+    if exact is not None:
+        return exact[1], exact[0]
+
+    # Nothing to compare against: skip the embeddings round trip.
+    if not any(cached_vec is not None for cached_vec, _, _ in _response_cache.values()):
+        return None, None
+
+    vec = _embed(key_text)
+    if vec is None:
+        return None, None
+
+    best_text, best_score = None, _CACHE_SIMILARITY
+    for cached_vec, text, _ in _response_cache.values():
+        if cached_vec is None:
+            continue
+        score = sum(map(operator.mul, vec, cached_vec))
+        if score >= best_score:
+            best_text, best_score = text, score
+    return best_text, vec
+
+
+def semantic_put(key_text: str, vec: list[float] | None, assistant_text: str) -> None:
+    """Store an answer, evicting the oldest entries past the size cap.
+
+    *vec* is the embedding from :func:`semantic_get`, if it computed one.
+    """
+    if vec is None:
+        vec = _embed(key_text)
+    _response_cache[hashlib.sha1(key_text.encode()).hexdigest()] = (vec, assistant_text, time.time())
+    while len(_response_cache) > _CACHE_MAX_ENTRIES:
+        _response_cache.popitem(last=False)
+
+
 # ---------------------------------------------------------------------------
 # Chat loop
 # ---------------------------------------------------------------------------
 
+def stream_reply(agent, messages: list[dict]) -> str:
+    """Print the agent's answer token by token and return the full text.
+
+    Only the model node's output is shown; tool results stay hidden.  If the
+    model speaks before a tool call, the final answer starts on a new line
+    and only that final message is returned.
+    """
+    print("\nAssistant: ", end="", flush=True)
+    parts: list[str] = []
+    message_id = None
+
+    for chunk, metadata in agent.stream({"messages": messages}, stream_mode="messages"):
+        if metadata.get("langgraph_node") != "model" or not isinstance(chunk, AIMessageChunk):
+            continue
+        if chunk.id != message_id:
+            message_id = chunk.id
+            if parts:
+                print()
+            parts = []
+        token = chunk.text
+        if token:
+            print(token, end="", flush=True)
+            parts.append(token)
+
+    print("\n")
+    return "".join(parts)
+
+
 def main():
     print("=" * 60)
     print("  UF Course Assistant (Spring 2026)")
-    print("  Type your question, or 'quit' to exit.")
+    print("  Type your question, 'new' to start over, or 'quit' to exit.")
     print("=" * 60)
     print()
 
@@ -108,18 +312,30 @@ def main():
         if user_input.lower() in ("quit", "exit", "q"):
             print("Goodbye!")
             break
+        if user_input.lower() == "new":
+            conversation_history = []
+            print("\nStarting a new conversation.\n")
+            continue
 
-        conversation_history.append({"role": "user", "content": user_input})
+        opening = not conversation_history
+        if opening:
+            key_text = _cache_key_text(user_input)
+            cached, vec = semantic_get(key_text)
+        else:
+            cached = None
 
-        response = agent.invoke({"messages": conversation_history})
+        conversation_history.append({"role": "user", "content": user_input})
 
-        # The last message in the response is the assistant's final answer
-        assistant_message = response["messages"][-1]
-        assistant_text = assistant_message.content
+        if cached is not None:
+            assistant_text = cached
+            print(f"\nAssistant: {assistant_text}\n")
+        else:
+            assistant_text = stream_reply(agent, conversation_history)
+            if opening:
+                semantic_put(key_text, vec, assistant_text)
 
         conversation_history.append({"role": "assistant", "content": assistant_text})
-
-        print(f"\nAssistant: {assistant_text}\n")
+        conversation_history = compact_history(conversation_history)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 
 import requests
-import json
+import orjson
+import zstandard
+from requests.adapters import HTTPAdapter
 import time
 import argparse
+import glob
 import os
 import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 
@@ -13,16 +19,28 @@ from typing import Optional, List, Dict
 USER_AGENT = "script:ufl-flair-scraper:1.2"
 REQUEST_TIMEOUT = 15
 DEFAULT_RATE_LIMIT = 1.0
+DEFAULT_WORKERS = 8
 MAX_RETRIES = 3
+ZSTD_LEVEL = 3
 
 BASE_OUTPUT_DIR = "reddit_scrapes"
 RUNS_DIR = os.path.join(BASE_OUTPUT_DIR, "runs")
 MASTER_DIR = os.path.join(BASE_OUTPUT_DIR, "master")
-MASTER_FILE_TEMPLATE = "{subreddit}_master.json"
+MASTER_DB_TEMPLATE = "{subreddit}_master.db"
+LEGACY_MASTER_TEMPLATE = "{subreddit}_master.json"
+HTTP_CACHE_PATH = os.path.join(BASE_OUTPUT_DIR, "http_cache.db")
+HTTP_CACHE_TTL = 3600  # serve without revalidating for this long
+HTTP_CACHE_MAX_AGE = 7 * 86400  # prune entries older than this
+HTTP_CACHE_MAX_ROWS = 2000  # keep only the most recently fetched responses
 # ----------------------------
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# One keep-alive session for every request; retries are handled by safe_request.
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": USER_AGENT})
+_SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=0))
+
 
 # ---------- filesystem ----------
 def ensure_dirs():
@@ -31,6 +49,34 @@ def ensure_dirs():
 
 
 # ---------- utils ----------
+def write_json(path: str, obj, pretty: bool = False):
+    # orjson writes UTF-8 bytes directly; indentation is opt-in since it
+    # roughly doubles file size on large snapshots. Paths ending in .zst are
+    # zstd-compressed.
+    option = orjson.OPT_INDENT_2 if pretty else 0
+    data = orjson.dumps(obj, option=option)
+    if path.endswith(".zst"):
+        data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read_json(path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return orjson.loads(data)
+
+
+def compress_runs():
+    # One-time migration of plain-JSON run snapshots to .json.zst
+    for path in glob.glob(os.path.join(RUNS_DIR, "*.json")):
+        write_json(path + ".zst", read_json(path))
+        os.remove(path)
+        logging.info("Compressed run snapshot: %s", path)
+
+
 def epoch_from_iso(date_str: str) -> int:
     return int(datetime.strptime(date_str, "%Y-%m-%d").timestamp())
 
@@ -42,61 +88,195 @@ def parse_flairs(flairs: List[str]) -> List[str]:  # NEW
     return result
 
 
-def safe_request(url: str, params: dict = None):
-    headers = {"User-Agent": USER_AGENT}
+class RateLimiter:
+    """Space request start times at least `interval` seconds apart across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# ---------- http cache ----------
+# Responses are kept in a small SQLite store. Within HTTP_CACHE_TTL they are
+# served without touching the network (reruns of the same flair/day window
+# re-issue identical requests); after that they are revalidated with
+# If-None-Match / If-Modified-Since so unchanged pages come back as a 304.
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def _http_cache_conn():
+    global _http_cache
+    if _http_cache is None:
+        os.makedirs(BASE_OUTPUT_DIR, exist_ok=True)
+        _http_cache = sqlite3.connect(HTTP_CACHE_PATH, check_same_thread=False)
+        with _http_cache:
+            _http_cache.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, "
+                "etag TEXT, last_modified TEXT, body BLOB NOT NULL)"
+            )
+            _http_cache.execute(
+                "CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)"
+            )
+            _http_cache.execute(
+                "DELETE FROM responses WHERE fetched_at < ?",
+                (time.time() - HTTP_CACHE_MAX_AGE,)
+            )
+            _trim_http_cache(_http_cache)
+    return _http_cache
+
+
+def _trim_http_cache(conn):
+    # Comment pages are large; a long backfill would otherwise grow the file
+    # without bound, so drop the least recently fetched rows past the cap.
+    conn.execute(
+        "DELETE FROM responses WHERE key IN ("
+        "SELECT key FROM responses ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+        (HTTP_CACHE_MAX_ROWS,)
+    )
+
+
+def cache_lookup(key: str):
+    with _http_cache_lock:
+        return _http_cache_conn().execute(
+            "SELECT fetched_at, etag, last_modified, body FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+
+def cache_store(key: str, etag: Optional[str], last_modified: Optional[str], body: bytes):
+    with _http_cache_lock:
+        conn = _http_cache_conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, time.time(), etag, last_modified, body)
+            )
+            _trim_http_cache(conn)
+
+
+def cache_touch(key: str):
+    with _http_cache_lock:
+        conn = _http_cache_conn()
+        with conn:
+            conn.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+
+
+def safe_request(url: str, params: dict = None, limiter: Optional[RateLimiter] = None):
+    key = requests.Request("GET", url, params=sorted((params or {}).items())).prepare().url
+    cached = cache_lookup(key)
+    if cached and time.time() - cached[0] < HTTP_CACHE_TTL:
+        return orjson.loads(cached[3])
+
+    headers = {}
+    if cached and cached[1]:
+        headers["If-None-Match"] = cached[1]
+    if cached and cached[2]:
+        headers["If-Modified-Since"] = cached[2]
+
     backoff = 1.0
     for attempt in range(MAX_RETRIES):
+        if limiter:
+            limiter.wait()
         try:
-            r = requests.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            r = _SESSION.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            if r.status_code == 304 and cached:
+                cache_touch(key)
+                return orjson.loads(cached[3])
             r.raise_for_status()
-            return r.json()
+            data = r.json()
+            cache_store(key, r.headers.get("ETag"), r.headers.get("Last-Modified"), r.content)
+            return data
         except requests.RequestException as e:
             logging.warning(f"Request failed ({attempt+1}/{MAX_RETRIES}): {e}")
             time.sleep(backoff)
             backoff *= 2
+
+    if cached:
+        logging.warning("Serving stale cached response for %s", url)
+        return orjson.loads(cached[3])
     raise RuntimeError(f"Failed request: {url}")
 
 
 # ---------- comments ----------
 def parse_comment(node):
+    # Walk the reply tree with an explicit stack so deeply nested threads
+    # can't hit Python's recursion limit.
     if node.get("kind") != "t1":
         return None
-    d = node["data"]
-    comment = {
-        "id": d.get("id"),
-        "author": d.get("author"),
-        "body": d.get("body"),
-        "score": d.get("score"),
-        "created_utc": d.get("created_utc"),
-        "replies": []
-    }
-    replies = d.get("replies")
-    if isinstance(replies, dict):
-        for child in replies["data"]["children"]:
-            parsed = parse_comment(child)
-            if parsed:
-                comment["replies"].append(parsed)
-    return comment
-
-
-def fetch_comments(permalink, rate_limit):
+    root = None
+    stack = [(node, None)]
+    while stack:
+        current, parent = stack.pop()
+        if current.get("kind") != "t1":
+            continue
+        d = current["data"]
+        comment = {
+            "id": d.get("id"),
+            "author": d.get("author"),
+            "body": d.get("body"),
+            "score": d.get("score"),
+            "created_utc": d.get("created_utc"),
+            "replies": []
+        }
+        if parent is None:
+            root = comment
+        else:
+            parent["replies"].append(comment)
+        replies = d.get("replies")
+        if isinstance(replies, dict):
+            # Push in reverse so replies are visited (and appended) in order
+            for child in reversed(replies["data"]["children"]):
+                stack.append((child, comment))
+    return root
+
+
+def fetch_comments(permalink, limiter: RateLimiter):
     url = f"https://www.reddit.com{permalink}.json"
-    data = safe_request(url, params={"limit": 500})
+    data = safe_request(url, params={"limit": 500}, limiter=limiter)
     comments = []
     if isinstance(data, list) and len(data) > 1:
         for node in data[1]["data"]["children"]:
             parsed = parse_comment(node)
             if parsed:
                 comments.append(parsed)
-    time.sleep(rate_limit)
     return comments
 
 
+def fetch_all_comments(posts, rate_limit, workers):
+    # Requests overlap across workers, but the shared limiter still starts at
+    # most one network request every `rate_limit` seconds to stay polite to
+    # reddit (cache hits skip it).
+    limiter = RateLimiter(rate_limit)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_comments, post["permalink"], limiter): post for post in posts}
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                futures[future]["comments"] = future.result()
+                if i % 10 == 0:
+                    logging.info("Comments fetched: %d/%d", i, len(posts))
+        except BaseException:
+            # Fail fast like the old sequential loop: drop the queued
+            # fetches instead of letting the pool's exit run them all first.
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
 # ---------- scraping ----------
-def scrape_posts(subreddit, flair, since_ts, until_ts, max_posts, rate_limit):
+def scrape_posts(subreddit, flair, since_ts, until_ts, max_posts, rate_limit, keep_raw=False):
     posts = {}
     after = None
     query = f'flair:"{flair}"'
+    limiter = RateLimiter(rate_limit)
 
     while True:
         params = {
@@ -108,7 +288,7 @@ def scrape_posts(subreddit, flair, since_ts, until_ts, max_posts, rate_limit):
         if after:
             params["after"] = after
 
-        data = safe_request(f"https://www.reddit.com/r/{subreddit}/search.json", params)
+        data = safe_request(f"https://www.reddit.com/r/{subreddit}/search.json", params, limiter)
         listing = data["data"]
         children = listing["children"]
 
@@ -139,9 +319,10 @@ def scrape_posts(subreddit, flair, since_ts, until_ts, max_posts, rate_limit):
                     "flair": p["link_flair_text"],
                     "permalink": p["permalink"],
                     "url": p["url"],
-                    "comments": None,
-                    "raw": p
+                    "comments": None
                 }
+                if keep_raw:
+                    posts[pid]["raw"] = p
 
             if max_posts and len(posts) >= max_posts:
                 return list(posts.values())
@@ -153,35 +334,93 @@ def scrape_posts(subreddit, flair, since_ts, until_ts, max_posts, rate_limit):
         if not after:
             break
 
-        time.sleep(rate_limit)
-
     return list(posts.values())
 
 
-# ---------- merge ----------
-def merge_into_master(subreddit: str, new_posts: List[dict]):
-    master_path = os.path.join(MASTER_DIR, MASTER_FILE_TEMPLATE.format(subreddit=subreddit))
-
-    if os.path.exists(master_path):
-        with open(master_path, "r", encoding="utf-8") as f:
-            master = json.load(f)
-    else:
-        master = {"posts": {}, "meta": {"created": datetime.utcnow().isoformat()}}
-
-    for post in new_posts:
-        master["posts"][post["id"]] = post
-
-    master["meta"]["last_updated"] = datetime.utcnow().isoformat()
-    master["meta"]["total_posts"] = len(master["posts"])
+# ---------- master store ----------
+_MASTER_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS posts (
+        id TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        created_utc INTEGER,
+        flair TEXT,
+        updated_at INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+)
+
+
+def open_master(subreddit: str) -> sqlite3.Connection:
+    db_path = os.path.join(MASTER_DIR, MASTER_DB_TEMPLATE.format(subreddit=subreddit))
+    conn = sqlite3.connect(db_path)
+    try:
+        # Schema, legacy import and the 'created' marker commit together, and
+        # the marker (not the file's existence) says whether initialisation
+        # finished -- a failed import is retried on the next open.
+        conn.execute("BEGIN")
+        for statement in _MASTER_SCHEMA:
+            conn.execute(statement)
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'created'").fetchone() is None:
+            created = datetime.utcnow().isoformat()
+            legacy_path = os.path.join(MASTER_DIR, LEGACY_MASTER_TEMPLATE.format(subreddit=subreddit))
+            if os.path.exists(legacy_path):
+                # One-time import of the old JSON master file
+                legacy = read_json(legacy_path)
+                upsert_posts(conn, legacy["posts"].values())
+                created = legacy["meta"].get("created", created)
+                logging.info("Imported legacy master file: %s", legacy_path)
+            conn.execute("INSERT INTO meta VALUES ('created', ?)", (created,))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        conn.close()
+        raise
+    return conn
+
+
+def upsert_posts(conn: sqlite3.Connection, posts):
+    now = int(datetime.utcnow().timestamp())
+    conn.executemany(
+        "INSERT OR REPLACE INTO posts (id, data, created_utc, flair, updated_at) VALUES (?, ?, ?, ?, ?)",
+        [(p["id"], orjson.dumps(p), p.get("created_utc"), p.get("flair"), now) for p in posts]
+    )
 
-    with open(master_path, "w", encoding="utf-8") as f:
-        json.dump(master, f, indent=2, ensure_ascii=False)
 
-    logging.info("Merged into master file: %s", master_path)
+def merge_into_master(subreddit: str, new_posts: List[dict]):
+    conn = open_master(subreddit)
+    try:
+        with conn:
+            upsert_posts(conn, new_posts)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('last_updated', ?)",
+                (datetime.utcnow().isoformat(),)
+            )
+    finally:
+        conn.close()
+
+    logging.info("Merged %d posts into master store: %s", len(new_posts), subreddit)
+
+
+def export_master(subreddit: str, out_path: str, pretty: bool = False):
+    conn = open_master(subreddit)
+    try:
+        rows = conn.execute("SELECT id, data FROM posts ORDER BY created_utc")
+        posts = {pid: orjson.loads(data) for pid, data in rows}
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+    finally:
+        conn.close()
+
+    meta["total_posts"] = len(posts)
+    write_json(out_path, {"posts": posts, "meta": meta}, pretty)
+    logging.info("Exported %d posts to %s", len(posts), out_path)
 
 
 # ---------- orchestrator ----------
-def run_for_flair(subreddit, flair, days, since, until, max_posts, rate_limit, merge):
+def run_for_flair(subreddit, flair, days, since, until, max_posts, rate_limit, merge,
+                  workers=DEFAULT_WORKERS, pretty=False, keep_raw=False):
     ensure_dirs()
 
     now = int(datetime.utcnow().timestamp())
@@ -193,29 +432,25 @@ def run_for_flair(subreddit, flair, days, since, until, max_posts, rate_limit, m
         until_ts = epoch_from_iso(until) + 86399 if until else None
 
     logging.info("Scraping flair: %s", flair)
-    posts = scrape_posts(subreddit, flair, since_ts, until_ts, max_posts, rate_limit)
+    posts = scrape_posts(subreddit, flair, since_ts, until_ts, max_posts, rate_limit, keep_raw)
 
     logging.info("Fetching comments for %d posts", len(posts))
-    for i, post in enumerate(posts, 1):
-        post["comments"] = fetch_comments(post["permalink"], rate_limit)
-        if i % 10 == 0:
-            logging.info("Comments fetched: %d/%d", i, len(posts))
+    fetch_all_comments(posts, rate_limit, workers)
 
     timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    run_file = f"{subreddit}_{flair.replace(' ', '_')}_{timestamp}.json"
+    run_file = f"{subreddit}_{flair.replace(' ', '_')}_{timestamp}.json.zst"
     run_path = os.path.join(RUNS_DIR, run_file)
 
-    with open(run_path, "w", encoding="utf-8") as f:
-        json.dump({
-            "meta": {
-                "subreddit": subreddit,
-                "flair": flair,
-                "since_ts": since_ts,
-                "until_ts": until_ts,
-                "scraped_at": timestamp
-            },
-            "posts": posts
-        }, f, indent=2, ensure_ascii=False)
+    write_json(run_path, {
+        "meta": {
+            "subreddit": subreddit,
+            "flair": flair,
+            "since_ts": since_ts,
+            "until_ts": until_ts,
+            "scraped_at": timestamp
+        },
+        "posts": posts
+    }, pretty)
 
     logging.info("Saved run snapshot: %s", run_path)
 
@@ -227,16 +462,27 @@ def run_for_flair(subreddit, flair, days, since, until, max_posts, rate_limit, m
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--subreddit", required=True)
-    ap.add_argument("--flairs", nargs="+", required=True, help="Comma or space separated flairs")  # MODIFIED
+    ap.add_argument("--flairs", nargs="+", help="Comma or space separated flairs")  # MODIFIED
     ap.add_argument("--days", type=int)
     ap.add_argument("--since")
     ap.add_argument("--until")
     ap.add_argument("--max-posts", type=int)
     ap.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT)
     ap.add_argument("--merge", action="store_true")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent comment fetches")
+    ap.add_argument("--pretty", action="store_true", help="Indent JSON output")
+    ap.add_argument("--keep-raw", action="store_true", help="Store the full reddit post payload under 'raw'")
+    ap.add_argument("--export-master", metavar="PATH", help="Write the master store to a JSON file (.zst to compress)")
+    ap.add_argument("--compress-runs", action="store_true", help="Compress existing .json run snapshots and exit")
 
     args = ap.parse_args()
-    flairs = parse_flairs(args.flairs)
+    if args.compress_runs:
+        ensure_dirs()
+        compress_runs()
+        return
+    if not args.flairs and not args.export_master:
+        ap.error("--flairs is required unless --export-master is given")
+    flairs = parse_flairs(args.flairs or [])
 
     for flair in flairs:
         run_for_flair(
@@ -247,9 +493,16 @@ def main():
             until=args.until,
             max_posts=args.max_posts,
             rate_limit=args.rate_limit,
-            merge=args.merge
+            merge=args.merge,
+            workers=args.workers,
+            pretty=args.pretty,
+            keep_raw=args.keep_raw
         )
 
+    if args.export_master:
+        ensure_dirs()
+        export_master(args.subreddit, args.export_master, args.pretty)
+
 
 if __name__ == "__main__":
     main()
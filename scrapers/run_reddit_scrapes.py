@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 
-import subprocess
 import json
 import os
 from datetime import datetime, timedelta
 import logging
 
+from reddit_flair_scraper import run_for_flair
+
 # ---------- CONFIG ----------
-SCRAPER = "reddit_flair_scraper.py"
 SUBREDDIT = "UFL"
 FLAIRS = ["Classes", "Schedule", "Graduation"]
 
@@ -15,7 +15,7 @@ STATE_DIR = "reddit_scrapes/state"
 INITIAL_STATE = os.path.join(STATE_DIR, "initial_progress.json")
 DAILY_STATE = os.path.join(STATE_DIR, "daily_progress.json")
 
-RATE_LIMIT = "5.0"
+RATE_LIMIT = 5.0
 # ----------------------------
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -38,17 +38,19 @@ def save_state(path, data):
 
 
 def run_scraper(flair, since, until):
-    cmd = [
-        "python", SCRAPER,
-        "--subreddit", SUBREDDIT,
-        "--flairs", flair,
-        "--since", since,
-        "--until", until,
-        "--rate-limit", RATE_LIMIT,
-        "--merge"
-    ]
-    logging.info("Running: %s", " ".join(cmd))
-    subprocess.check_call(cmd)
+    # Called in-process (rather than one subprocess per run) so imports and
+    # HTTP connections are shared across every flair/day.
+    logging.info("Running scraper: flair=%s since=%s until=%s", flair, since, until)
+    run_for_flair(
+        subreddit=SUBREDDIT,
+        flair=flair,
+        days=None,
+        since=since,
+        until=until,
+        max_posts=None,
+        rate_limit=RATE_LIMIT,
+        merge=True
+    )
 
 
 # ---------- INITIAL BACKFILL ----------
@@ -82,8 +84,8 @@ def run_initial():
                 ).isoformat()
                 save_state(INITIAL_STATE, state)
 
-            except subprocess.CalledProcessError:
-                logging.error("Failed at %s for flair %s", current, flair)
+            except Exception:
+                logging.exception("Failed at %s for flair %s", current, flair)
                 save_state(INITIAL_STATE, state)
                 return
 
@@ -104,8 +106,8 @@ def run_daily():
     for flair in FLAIRS:
         try:
             run_scraper(flair, since, until)
-        except subprocess.CalledProcessError:
-            logging.error("Daily scrape failed for flair %s", flair)
+        except Exception:
+            logging.exception("Daily scrape failed for flair %s", flair)
             return
 
     state["last_run"] = datetime.utcnow().isoformat()
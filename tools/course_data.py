@@ -1,13 +1,20 @@
 """
 Course data module -- live queries against the UF One.UF Schedule of Courses API.
 
-All searches hit the API in real time so results are always up to date.
+Searches hit the API in real time; responses are cached for a few minutes
+(in memory and on disk) so repeated lookups stay fast without going stale.
 """
 
+import functools
 import logging
+import os
 from datetime import date
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+from tools.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,17 +26,32 @@ _BASE_URL = "https://one.ufl.edu/apix/soc/schedule/"
 _CATEGORY = "RES"
 _TIMEOUT = 15  # seconds
 
+# Shared keep-alive session so repeat calls skip the TCP/TLS handshake.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
-def _current_term() -> str:
-    """Auto-detect the current UF term code based on today's date.
+# Responses are cached in memory and in a small SQLite file so repeated
+# lookups (very common within an agent session) skip the network entirely.
+# Public: answers built from this data (chat.py, tui.py) expire with it.
+CACHE_TTL = 600  # seconds
+_CACHE_MAXSIZE = 1024
+_CACHE_MAX_ROWS = 4096
+_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "uf_soc", "cache.sqlite3")
+
+
+# Months in which the Spring, Summer, and Fall terms start
+_TERM_START_MONTHS = (1, 5, 8)
+
+
+def term_for(d: date) -> str:
+    """Return the UF term code for the semester containing *d*.
 
     Term format: ``2`` + 2-digit year + semester digit
         Spring = 1, Summer = 5, Fall = 8
     Example: Spring 2026 -> ``2261``
     """
-    today = date.today()
-    year = today.year % 100
-    month = today.month
+    year = d.year % 100
+    month = d.month
     if month <= 4:
         sem = "1"  # Spring
     elif month <= 7:
@@ -39,6 +61,28 @@ def _current_term() -> str:
     return f"2{year}{sem}"
 
 
+@functools.lru_cache(maxsize=64)
+def term_codes_in_range(start: date, end: date) -> tuple[str, ...]:
+    """Return the term codes for every semester overlapping *start*..*end*, in order."""
+    def term_start(d: date) -> date:
+        month = max(m for m in _TERM_START_MONTHS if m <= d.month)
+        return date(d.year, month, 1)
+
+    first, last = term_start(start), term_start(end)
+    return tuple(
+        term_for(date(year, month, 1))
+        for year in range(start.year, end.year + 1)
+        for month in _TERM_START_MONTHS
+        if first <= date(year, month, 1) <= last
+    )
+
+
+@functools.cache
+def _current_term() -> str:
+    """Auto-detect the current UF term code based on today's date."""
+    return term_for(date.today())
+
+
 # Resolved once at import time; override with set_term() if needed.
 _term = _current_term()
 
@@ -54,33 +98,49 @@ def get_term() -> str:
     return _term
 
 
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+# key -> JSON-encoded course list.  Bodies are stored encoded so every hit
+# decodes into fresh dicts the caller is free to mutate.
+_cache = ResponseCache(
+    _CACHE_PATH,
+    ttl=CACHE_TTL,
+    maxsize=_CACHE_MAXSIZE,
+    max_rows=_CACHE_MAX_ROWS,
+    label="UF API",
+    encode=bytes,
+    decode=bytes,
+)
+
+
 # ---------------------------------------------------------------------------
 # Internal API helpers
 # ---------------------------------------------------------------------------
 
-def _query_api(extra_params: dict) -> list[dict]:
-    """Make a single request to the UF SOC API and return a list of courses.
+def _section_sort_key(section: dict) -> tuple[str, str]:
+    return str(section.get("number", "")), str(section.get("classNumber", ""))
 
-    The API returns at most 50 courses per call.  For targeted searches
-    (by code or title) this is almost always sufficient.
-    """
-    params = {
-        "category": _CATEGORY,
-        "term": _term,
-        "last-control-number": 0,
-    }
-    params.update(extra_params)
 
+def _fetch_courses(params: dict) -> list[dict] | None:
+    """Make a single request to the UF SOC API.
+
+    Returns the list of courses, or ``None`` if the request failed (failures
+    are never cached).
+    """
     try:
-        resp = requests.get(_BASE_URL, params=params, timeout=_TIMEOUT)
+        resp = _SESSION.get(_BASE_URL, params=params, timeout=_TIMEOUT)
         resp.raise_for_status()
-        data = resp.json()
     except requests.RequestException as exc:
         logger.error("UF API request failed: %s", exc)
-        return []
-    except ValueError:
+        return None
+
+    try:
+        data = orjson.loads(resp.content)
+    except orjson.JSONDecodeError:
         logger.error("UF API returned invalid JSON")
-        return []
+        return None
 
     courses: list[dict] = []
     if isinstance(data, list):
@@ -89,11 +149,67 @@ def _query_api(extra_params: dict) -> list[dict]:
                 # Add codeWithSpace for display convenience
                 code = course.get("code", "")
                 course["codeWithSpace"] = code[:3] + " " + code[3:] if len(code) > 3 else code
+                # Sort once here, before caching, so every listing is in
+                # section order without re-sorting on each tool call.
+                sections = course.get("sections")
+                if sections:
+                    sections.sort(key=_section_sort_key)
                 courses.append(course)
 
     return courses
 
 
+_WHITESPACE_DELETE = str.maketrans("", "", " \t\r\n")
+
+
+def normalize_code(code: str) -> str:
+    """Canonical form of a course code query (``"cop 3530"`` -> ``"COP3530"``)."""
+    # Codes usually come back from an earlier search result already in
+    # canonical form, so skip the copy when there is nothing to do.
+    if code.isalnum() and code.isupper():
+        return code
+    return code.translate(_WHITESPACE_DELETE).upper()
+
+
+def normalize_title(title: str) -> str:
+    """Canonical form of a title query: lower-cased, single-spaced.
+
+    The SOC title search is case-insensitive, so equivalent queries collapse
+    to one cache entry.
+    """
+    return " ".join(title.lower().split())
+
+
+def _query_api(extra_params: dict) -> list[dict]:
+    """Query the UF SOC API for a list of courses, using the response cache.
+
+    The API returns at most 50 courses per call.  For targeted searches
+    (by code or title) this is almost always sufficient.
+    """
+    key = (_term, tuple(sorted(extra_params.items())))
+    body = _cache.get(key)
+    if body is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Damaged disk row: refetch, and the _cache.put below replaces it
+            logger.warning("UF API cache entry unreadable: %r", key)
+
+    params = {
+        "category": _CATEGORY,
+        "term": _term,
+        "last-control-number": 0,
+    }
+    params.update(extra_params)
+
+    courses = _fetch_courses(params)
+    if courses is None:
+        return []
+
+    _cache.put(key, orjson.dumps(courses))
+    return courses
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -108,7 +224,7 @@ def search_by_code(query: str, limit: int = 10) -> list[dict]:
     Returns:
         List of course dicts from the API.
     """
-    courses = _query_api({"course-code": query.strip()})
+    courses = _query_api({"course-code": normalize_code(query)})
     return courses[:limit]
 
 
@@ -122,7 +238,7 @@ def search_by_name(query: str, limit: int = 10) -> list[dict]:
     Returns:
         List of course dicts from the API.
     """
-    courses = _query_api({"course-title": query.strip()})
+    courses = _query_api({"course-title": normalize_title(query)})
     return courses[:limit]
 
 
@@ -132,4 +248,4 @@ def get_courses(code: str) -> list[dict]:
     Returns a list because some codes (e.g. Special Topics) have multiple
     listings with different subtitles.
     """
-    return _query_api({"course-code": code.strip()})
+    return _query_api({"course-code": normalize_code(code)})
@@ -9,7 +9,14 @@ Provides three tools:
 
 from langchain_core.tools import tool
 
-from tools.course_data import get_courses, search_by_code, search_by_name
+from tools.course_data import (
+    get_courses,
+    normalize_code,
+    normalize_title,
+    search_by_code,
+    search_by_name,
+)
+from tools.formatting import truncate
 
 
 # ---------------------------------------------------------------------------
@@ -23,10 +30,20 @@ _DELIVERY_MODE = {
 }
 
 
+# Default number of sections listed in full by get_course_sections.  Large
+# lecture courses can have hundreds; the aggregate stats still cover them all.
+_MAX_SECTIONS = 25
+
+
 # ---------------------------------------------------------------------------
 # Formatting helpers
 # ---------------------------------------------------------------------------
 
+def _fmt_credits(cmin, cmax) -> str:
+    """Format a credit range as ``"3"`` or ``"1-4"``."""
+    return str(cmin) if cmin == cmax else f"{cmin}-{cmax}"
+
+
 def _format_course_summary(course: dict, index: int) -> str:
     """Format a single course for the search result list."""
     code_spaced = course.get("codeWithSpace", course["code"])
@@ -44,7 +61,7 @@ def _format_course_summary(course: dict, index: int) -> str:
         dept = s0.get("deptName", "")
         cmin = s0.get("credits_min", s0.get("credits", ""))
         cmax = s0.get("credits_max", s0.get("credits", ""))
-        credits = str(cmin) if cmin == cmax else f"{cmin}-{cmax}"
+        credits = _fmt_credits(cmin, cmax)
 
     lines = [f"{index}. {code_spaced} - {name}"]
     meta_parts = []
@@ -57,8 +74,7 @@ def _format_course_summary(course: dict, index: int) -> str:
 
     if description:
         # Truncate long descriptions to keep results compact
-        desc = description if len(description) <= 200 else description[:197] + "..."
-        lines.append(f"   Description: {desc}")
+        lines.append(f"   Description: {truncate(description, 200)}")
     if prerequisites:
         lines.append(f"   {prerequisites}")
 
@@ -98,7 +114,8 @@ def _format_section(section: dict) -> str:
     """Format a single section for the get_course_sections result."""
     number = section.get("number", "?")
     class_num = section.get("classNumber", "?")
-    delivery = _DELIVERY_MODE.get(section.get("sectWeb", ""), section.get("sectWeb", "Unknown"))
+    sect_web = section.get("sectWeb", "")
+    delivery = _DELIVERY_MODE.get(sect_web) or sect_web or "Unknown"
 
     instructors = ", ".join(
         inst.get("name", "TBA") for inst in section.get("instructors", [])
@@ -111,9 +128,10 @@ def _format_section(section: dict) -> str:
     else:
         schedule = "No fixed meeting times"
 
-    credits_min = section.get("credits_min", section.get("credits", ""))
-    credits_max = section.get("credits_max", section.get("credits", ""))
-    credits = str(credits_min) if credits_min == credits_max else f"{credits_min}-{credits_max}"
+    credits = _fmt_credits(
+        section.get("credits_min", section.get("credits", "")),
+        section.get("credits_max", section.get("credits", "")),
+    )
 
     final_exam = section.get("finalExam", "").strip()
     note = section.get("note", "").strip()
@@ -125,10 +143,14 @@ def _format_section(section: dict) -> str:
     wl_cap = waitlist.get("cap", 0)
     fee = section.get("courseFee", 0)
 
-    lines = [f"  Section {number} (Class# {class_num}) - {delivery}"]
-    lines.append(f"    Instructor: {instructors}")
-    lines.append(f"    Credits: {credits}")
-    lines.append(f"    Schedule: {schedule}")
+    # The first four lines are always present; build them in one go and only
+    # append the optional ones.
+    lines = [
+        f"  Section {number} (Class# {class_num}) - {delivery}\n"
+        f"    Instructor: {instructors}\n"
+        f"    Credits: {credits}\n"
+        f"    Schedule: {schedule}"
+    ]
     if final_exam:
         lines.append(f"    Final Exam: {final_exam}")
     if open_seats is not None:
@@ -171,9 +193,9 @@ def search_courses_by_code(course_code: str) -> str:
         course_code: A full or partial course code (e.g. "COP3530", "COP",
                      "MAC 2311").
     """
-    code = course_code.strip().replace(" ", "")
+    code = normalize_code(course_code)
     results = search_by_code(code, limit=10)
-    return _format_results(results, course_code)
+    return _format_results(results, code)
 
 
 @tool
@@ -187,12 +209,13 @@ def search_courses_by_title(title: str) -> str:
         title: A course name or keyword (e.g. "Data Structures", "Calculus",
                "Machine Learning", "Organic Chemistry").
     """
-    results = search_by_name(title.strip(), limit=10)
-    return _format_results(results, title)
+    title_normalized = normalize_title(title)
+    results = search_by_name(title_normalized, limit=10)
+    return _format_results(results, title_normalized)
 
 
 @tool
-def get_course_sections(course_code: str) -> str:
+def get_course_sections(course_code: str, max_sections: int = _MAX_SECTIONS) -> str:
     """Get detailed section information for a specific UF course.
 
     Use this after a course search to get full details about a course's
@@ -202,19 +225,21 @@ def get_course_sections(course_code: str) -> str:
     Args:
         course_code: The exact course code (e.g. "COP3530"). Spaces are
                      optional (e.g. "COP 3530" also works).
+        max_sections: How many sections to list in full (default 25). Only
+                      raise this if the student needs a section beyond the
+                      first page.
     """
-    code_normalized = course_code.strip().replace(" ", "").upper()
+    code_normalized = normalize_code(course_code)
+    max_sections = max(1, max_sections)
     entries = get_courses(code_normalized)
 
     if not entries:
         return (
-            f'No course found with code "{course_code}". '
+            f'No course found with code "{code_normalized}". '
             "Use search_courses_by_code or search_courses_by_title to find "
             "the correct course code first."
         )
 
-    from collections import Counter
-
     output_parts: list[str] = []
 
     for entry in entries:
@@ -233,26 +258,34 @@ def get_course_sections(course_code: str) -> str:
         if prerequisites:
             lines.append(f"{prerequisites}")
 
-        # --- Aggregate stats ---
+        # --- Aggregate stats (single pass over sections) ---
         total = len(sections)
+        cmin = cmax = None
+        mode_counts: dict[str, int] = {}  # delivery mode -> count, first-seen order
+        gen_ed_tags: set[str] = set()
+        quest_tags: set[str] = set()
+        for s in sections:
+            s_min = s.get("credits_min", s.get("credits", 0))
+            s_max = s.get("credits_max", s.get("credits", 0))
+            if cmin is None or s_min < cmin:
+                cmin = s_min
+            if cmax is None or s_max > cmax:
+                cmax = s_max
+            mode = _DELIVERY_MODE.get(s.get("sectWeb", ""), "Unknown")
+            mode_counts[mode] = mode_counts.get(mode, 0) + 1
+            gen_ed_tags.update(s.get("genEd", ()))
+            quest_tags.update(s.get("quest", ()))
+
         if sections:
-            all_credits_min = [s.get("credits_min", s.get("credits", 0)) for s in sections]
-            all_credits_max = [s.get("credits_max", s.get("credits", 0)) for s in sections]
-            cmin = min(all_credits_min)
-            cmax = max(all_credits_max)
-            credit_str = str(cmin) if cmin == cmax else f"{cmin}-{cmax}"
+            credit_str = _fmt_credits(cmin, cmax)
         else:
             credit_str = "N/A"
 
-        # Delivery mode breakdown
-        mode_counts = Counter(
-            _DELIVERY_MODE.get(s.get("sectWeb", ""), "Unknown") for s in sections
-        )
         mode_summary = ", ".join(f"{count} {mode}" for mode, count in mode_counts.items())
 
         # Gen-ed and Quest tags (unique across all sections)
-        all_gen_ed = sorted({tag for s in sections for tag in s.get("genEd", [])})
-        all_quest = sorted({tag for s in sections for tag in s.get("quest", [])})
+        all_gen_ed = sorted(gen_ed_tags)
+        all_quest = sorted(quest_tags)
 
         lines.append(f"Total Sections: {total} | Credits: {credit_str}")
         lines.append(f"Delivery: {mode_summary}")
@@ -264,9 +297,14 @@ def get_course_sections(course_code: str) -> str:
         lines.append("")  # blank line before sections
 
         # --- Per-section details ---
-        for section in sections:
+        for section in sections[:max_sections]:
             lines.append(_format_section(section))
             lines.append("")  # blank line between sections
+        if total > max_sections:
+            lines.append(
+                f"  ... and {total - max_sections} more section(s). Call again "
+                "with a larger max_sections to list them."
+            )
 
         output_parts.append("\n".join(lines).rstrip())
 
@@ -0,0 +1,8 @@
+"""
+Small text helpers shared by the tool output formatters.
+"""
+
+
+def truncate(text: str, limit: int) -> str:
+    """Shorten *text* to at most *limit* characters, ending in ``"..."`` if cut."""
+    return text if len(text) <= limit else f"{text[:limit - 3]}..."
@@ -0,0 +1,153 @@
+"""
+Two-tier response cache shared by the tool modules: an in-memory LRU in
+front of a small SQLite file, so a fresh process still answers recent
+lookups without the network.
+"""
+
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """TTL cache of JSON-serialisable values, kept in memory and on disk.
+
+    Keys may be any value orjson can encode (strings, tuples of scalars);
+    they are stored on disk as their JSON text.  Values are written to disk
+    with *encode* and read back with *decode*; the defaults round-trip
+    through orjson, and callers that already hold the encoded bytes can pass
+    ``bytes`` for both.  A row that fails to decode counts as a miss.
+
+    Memory and disk entries share one TTL measured from when the value was
+    fetched, so a disk hit promoted to memory keeps its original age.  The
+    memory lock is never held during SQLite I/O.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        ttl: float,
+        maxsize: int,
+        max_rows: int,
+        label: str,
+        encode: Callable[[Any], bytes] = orjson.dumps,
+        decode: Callable[[bytes], Any] = orjson.loads,
+    ) -> None:
+        self._path = path
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._max_rows = max_rows
+        self._label = label
+        self._encode = encode
+        self._decode = decode
+        # key -> (fetched_at, value)
+        self._memory: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+    @functools.cached_property
+    def _disk(self) -> sqlite3.Connection | None:
+        """Open (creating if needed) the SQLite file, dropping stale rows.
+
+        Opened lazily on first lookup so importing a tool module stays free.
+        """
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, body BLOB NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)"
+                )
+                conn.execute(
+                    "DELETE FROM responses WHERE fetched_at < ?", (time.time() - self._ttl,)
+                )
+                self._trim(conn)
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("%s disk cache unavailable: %s", self._label, exc)
+            return None
+        return conn
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        """Delete the oldest rows beyond max_rows."""
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_rows,),
+        )
+
+    def _remember(self, key, fetched_at: float, value) -> None:
+        with self._memory_lock:
+            self._memory[key] = (fetched_at, value)
+            self._memory.move_to_end(key)
+            if len(self._memory) > self._maxsize:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value for *key*, or ``None`` if missing or expired."""
+        now = time.time()
+        with self._memory_lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if now - hit[0] < self._ttl:
+                    self._memory.move_to_end(key)
+                    return hit[1]
+                del self._memory[key]
+
+        disk = self._disk
+        if disk is None:
+            return None
+        try:
+            with self._disk_lock:
+                row = disk.execute(
+                    "SELECT fetched_at, body FROM responses WHERE key = ?",
+                    (orjson.dumps(key).decode(),),
+                ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning("%s disk cache read failed: %s", self._label, exc)
+            return None
+        if row is None or now - row[0] >= self._ttl:
+            return None
+        try:
+            value = self._decode(row[1])
+        except ValueError:
+            # Damaged row (e.g. truncated write): refetch, and the next put
+            # overwrites it.
+            logger.warning("%s disk cache entry unreadable: %r", self._label, key)
+            return None
+
+        self._remember(key, row[0], value)
+        return value
+
+    def put(self, key, value) -> None:
+        """Store *value* under *key* in both tiers."""
+        now = time.time()
+        self._remember(key, now, value)
+
+        disk = self._disk
+        if disk is None:
+            return
+        try:
+            body = self._encode(value)
+            with self._disk_lock, disk:
+                disk.execute(
+                    "INSERT OR REPLACE INTO responses (key, fetched_at, body) VALUES (?, ?, ?)",
+                    (orjson.dumps(key).decode(), now, body),
+                )
+                self._trim(disk)
+        except sqlite3.Error as exc:
+            logger.warning("%s disk cache write failed: %s", self._label, exc)
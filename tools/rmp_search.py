@@ -2,10 +2,28 @@
 LangChain tool for looking up professor ratings on RateMyProfessors.
 
 Queries the RMP GraphQL API on the fly for University of Florida professors.
+Results are cached in memory and in a small SQLite file, so a fresh process
+still answers common lookups without the network.
 """
 
+import functools
+import heapq
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import orjson
 import requests
 from langchain_core.tools import tool
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tools.formatting import truncate
+from tools.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # RMP GraphQL config
@@ -15,8 +33,9 @@ _RMP_URL = "https://www.ratemyprofessors.com/graphql"
 _UF_SCHOOL_ID = "U2Nob29sLTExMDA="  # Base64 for "School-1100" (UF)
 
 _HEADERS = {
-    "Accept": "application/json",
-    "Accept-Encoding": "gzip, deflate, br",
+    "Accept": "application/graphql-response+json, application/json",
+    # No "br": requests can only decode Brotli with an extra package installed
+    "Accept-Encoding": "gzip, deflate",
     "Accept-Language": "en-US,en;q=0.9",
     "Authorization": "Basic dGVzdDp0ZXN0",
     "Connection": "keep-alive",
@@ -30,6 +49,25 @@ _HEADERS = {
     ),
 }
 
+# Shared keep-alive session: the search -> ratings calls in
+# get_professor_reviews reuse one TLS connection.  The GraphQL POSTs are
+# read-only queries, so retrying them on gateway errors is safe.
+_SESSION = requests.Session()
+_SESSION.headers.update(_HEADERS)
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+        ),
+    ),
+)
+
 _RATINGS_QUERY = """
 query TeacherRatingsPageQuery($id: ID!, $count: Int!) {
     node(id: $id) {
@@ -56,62 +94,143 @@ query TeacherRatingsPageQuery($id: ID!, $count: Int!) {
 }
 """
 
+# Only the fields _format_professor and get_professor_reviews read; the rest
+# of the teacher object just adds payload and resolver work.
+_TEACHER_FIELDS = """
+fragment TeacherFields on Teacher {
+    id
+    legacyId
+    firstName
+    lastName
+    avgRatingRounded
+    numRatings
+    wouldTakeAgainPercentRounded
+    teacherRatingTags {
+        tagCount
+        tagName
+    }
+    mostUsefulRating {
+        class
+        isForOnlineClass
+        comment
+        grade
+        date
+        qualityRating
+        difficultyRatingRounded
+    }
+    avgDifficultyRounded
+    school {
+        name
+    }
+    department
+}
+"""
+
 _SEARCH_QUERY = """
 query NewSearchTeachersQuery($query: TeacherSearchQuery!) {
     newSearch {
         teachers(query: $query) {
-            didFallback
             edges {
-                cursor
                 node {
-                    id
-                    legacyId
-                    firstName
-                    lastName
-                    avgRatingRounded
-                    numRatings
-                    wouldTakeAgainPercentRounded
-                    wouldTakeAgainCount
-                    teacherRatingTags {
-                        id
-                        legacyId
-                        tagCount
-                        tagName
-                    }
-                    mostUsefulRating {
-                        id
-                        class
-                        isForOnlineClass
-                        legacyId
-                        comment
-                        helpfulRatingRounded
-                        ratingTags
-                        grade
-                        date
-                        iWouldTakeAgain
-                        qualityRating
-                        difficultyRatingRounded
-                        teacherNote {
-                            id
-                            comment
-                            createdAt
-                            class
-                        }
-                        thumbsDownTotal
-                        thumbsUpTotal
-                    }
-                    avgDifficultyRounded
-                    school {
-                        name
-                        id
-                    }
-                    department
+                    ...TeacherFields
                 }
             }
         }
     }
 }
-"""
+""" + _TEACHER_FIELDS
+
+# search_professor_ratings looks up several names in one request using
+# aliased searches (p0, p1, ...), capped at this many names per call.
+_MAX_BATCH_NAMES = 5
+
+# The query text never changes, so its JSON encoding is done once; each call
+# only serializes its variables and splices them in.
+_SEARCH_BODY_PREFIX = b'{"query":' + orjson.dumps(_SEARCH_QUERY) + b',"variables":'
+_RATINGS_BODY_PREFIX = b'{"query":' + orjson.dumps(_RATINGS_QUERY) + b',"variables":'
+
+
+@functools.lru_cache(maxsize=_MAX_BATCH_NAMES)
+def _batch_body_prefix(count: int) -> bytes:
+    """Encoded query prefix for a search of *count* names (variables q0..qN)."""
+    params = ", ".join(f"$q{i}: TeacherSearchQuery!" for i in range(count))
+    searches = "".join(
+        f"    p{i}: newSearch {{ teachers(query: $q{i}) {{ edges {{ node {{ ...TeacherFields }} }} }} }}\n"
+        for i in range(count)
+    )
+    query = f"query BatchSearchTeachersQuery({params}) {{\n{searches}}}\n" + _TEACHER_FIELDS
+    return b'{"query":' + orjson.dumps(query) + b',"variables":'
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+# Professors asked about once tend to come up again, so successful lookups
+# are kept in memory and in a small SQLite file for a day; the file survives
+# restarts.  Cached lists are shared between callers and must be treated as
+# read-only.  Set RMP_CACHE_DISABLED=1 to bypass the cache (e.g. when
+# testing).
+_CACHE_TTL = 86400  # seconds
+_CACHE_MAXSIZE = 512
+_CACHE_MAX_ROWS = 4096
+_CACHE_DISABLED = os.environ.get("RMP_CACHE_DISABLED") == "1"
+_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "uf_rmp", "cache.sqlite3")
+
+# search_professor_rating warms the ratings cache in the background for the
+# professors it returns, since a get_professor_reviews call often follows.
+_PREFETCH_REVIEWS = 5  # get_professor_reviews' default num_reviews
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rmp-prefetch")
+
+# Keys are ("professor", name) and ("ratings", id, count).
+_cache = ResponseCache(
+    _CACHE_PATH,
+    ttl=_CACHE_TTL,
+    maxsize=_CACHE_MAXSIZE,
+    max_rows=_CACHE_MAX_ROWS,
+    label="RMP",
+)
+
+# Identical lookups that overlap (parallel tool calls in one agent step, or
+# a review request racing the background prefetch) share one request: the
+# first caller fetches, later ones wait on its Future.
+_inflight: dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _cache_get(key: tuple) -> list[dict] | None:
+    """Return the cached value for *key* if present and younger than the TTL."""
+    if _CACHE_DISABLED:
+        return None
+    return _cache.get(key)
+
+
+def _cache_put(key: tuple, value: list[dict]) -> None:
+    if not _CACHE_DISABLED:
+        _cache.put(key, value)
+
+
+def _single_flight(key: tuple, fetch: Callable[[], list[dict]]) -> list[dict]:
+    """Run *fetch* unless an identical call is already running, then share its result."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        result = fetch()
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
 
 
 # ---------------------------------------------------------------------------
@@ -123,25 +242,26 @@ def _fetch_professor(name: str) -> list[dict]:
     Query RMP for a professor by name at UF. Returns a list of matching
     professor node dicts (may be empty).
     """
-    payload = {
-        "query": _SEARCH_QUERY,
-        "variables": {
-            "query": {
-                "text": name,
-                "schoolID": _UF_SCHOOL_ID,
-            }
-        },
-    }
+    key = name.strip().lower()
+    cached = _cache_get(("professor", key))
+    if cached is not None:
+        return cached
+    return _single_flight(("professor", key), lambda: _post_professor_search(name, key))
+
+
+def _post_professor_search(name: str, key: str) -> list[dict]:
+    variables = {"query": {"text": name, "schoolID": _UF_SCHOOL_ID}}
+    body = _SEARCH_BODY_PREFIX + orjson.dumps(variables) + b"}"
 
     try:
-        resp = requests.post(_RMP_URL, json=payload, headers=_HEADERS, timeout=10)
+        resp = _SESSION.post(_RMP_URL, data=body, timeout=10)
         resp.raise_for_status()
     except requests.RequestException as e:
         return [{"_error": f"Request failed: {e}"}]
 
     try:
-        data = resp.json()
-    except ValueError:
+        data = orjson.loads(resp.content)
+    except orjson.JSONDecodeError:
         return [{"_error": "Failed to decode RMP response"}]
 
     edges = (
@@ -151,21 +271,77 @@ def _fetch_professor(name: str) -> list[dict]:
         .get("edges", [])
     )
 
-    return [edge["node"] for edge in edges]
+    nodes = [edge["node"] for edge in edges]
+    _cache_put(("professor", key), nodes)
+    return nodes
+
+
+def _fetch_professors(names: list[str]) -> dict[str, list[dict]]:
+    """Like _fetch_professor for several names, with one request for all misses.
+
+    Returns ``{name: nodes}``; on a failed request every uncached name maps
+    to the same ``[{"_error": ...}]`` list.
+    """
+    results: dict[str, list[dict]] = {}
+    missing: list[str] = []
+    for name in names:
+        cached = _cache_get(("professor", name.strip().lower()))
+        if cached is not None:
+            results[name] = cached
+        else:
+            missing.append(name)
+    if not missing:
+        return results
+
+    variables = {
+        f"q{i}": {"text": name, "schoolID": _UF_SCHOOL_ID} for i, name in enumerate(missing)
+    }
+    body = _batch_body_prefix(len(missing)) + orjson.dumps(variables) + b"}"
+
+    try:
+        resp = _SESSION.post(_RMP_URL, data=body, timeout=10)
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+    except requests.RequestException as e:
+        error = [{"_error": f"Request failed: {e}"}]
+        return results | dict.fromkeys(missing, error)
+    except orjson.JSONDecodeError:
+        error = [{"_error": "Failed to decode RMP response"}]
+        return results | dict.fromkeys(missing, error)
+
+    found = data.get("data") or {}
+    for i, name in enumerate(missing):
+        search = found.get(f"p{i}")
+        if search is None:
+            # That alias failed server-side (GraphQL errors leave it null)
+            results[name] = [{"_error": "RMP search failed"}]
+            continue
+        edges = (search.get("teachers") or {}).get("edges", [])
+        nodes = [edge["node"] for edge in edges]
+        _cache_put(("professor", name.strip().lower()), nodes)
+        results[name] = nodes
+    return results
 
 
 def _fetch_ratings(professor_id: str, count: int = 10) -> list[dict]:
     """Fetch the most recent ratings for a professor by their RMP node ID."""
-    payload = {
-        "query": _RATINGS_QUERY,
-        "variables": {"id": professor_id, "count": count},
-    }
+    cached = _cache_get(("ratings", professor_id, count))
+    if cached is not None:
+        return cached
+    return _single_flight(
+        ("ratings", professor_id, count), lambda: _post_ratings_query(professor_id, count)
+    )
+
+
+def _post_ratings_query(professor_id: str, count: int) -> list[dict]:
+    variables = {"id": professor_id, "count": count}
+    body = _RATINGS_BODY_PREFIX + orjson.dumps(variables) + b"}"
 
     try:
-        resp = requests.post(_RMP_URL, json=payload, headers=_HEADERS, timeout=10)
+        resp = _SESSION.post(_RMP_URL, data=body, timeout=10)
         resp.raise_for_status()
-        data = resp.json()
-    except (requests.RequestException, ValueError):
+        data = orjson.loads(resp.content)
+    except (requests.RequestException, orjson.JSONDecodeError):
         return []
 
     edges = (
@@ -175,7 +351,27 @@ def _fetch_ratings(professor_id: str, count: int = 10) -> list[dict]:
         .get("edges", [])
     )
 
-    return [edge["node"] for edge in edges]
+    ratings = [edge["node"] for edge in edges]
+    if ratings:
+        _cache_put(("ratings", professor_id, count), ratings)
+    return ratings
+
+
+def _rated_matches(nodes: list[dict], name: str) -> list[dict]:
+    """Return the rated nodes, keeping only exact full-name matches if any exist.
+
+    Unrated stubs are dropped before any name comparison or formatting.
+    """
+    name_lower = name.lower()
+    exact: list[dict] = []
+    rated: list[dict] = []
+    for node in nodes:
+        if node.get("numRatings", 0) > 0:
+            rated.append(node)
+            full = f"{node.get('firstName', '')} {node.get('lastName', '')}".strip().lower()
+            if full == name_lower:
+                exact.append(node)
+    return exact or rated
 
 
 def _resolve_professor(name: str) -> dict | None:
@@ -188,18 +384,8 @@ def _resolve_professor(name: str) -> dict | None:
     if not nodes or "_error" in nodes[0]:
         return None
 
-    name_lower = name.lower()
-    for node in nodes:
-        full = f"{node.get('firstName', '')} {node.get('lastName', '')}".strip().lower()
-        if node.get("numRatings", 0) > 0 and full == name_lower:
-            return node
-
-    # Fallback: first node with ratings
-    for node in nodes:
-        if node.get("numRatings", 0) > 0:
-            return node
-
-    return None
+    matches = _rated_matches(nodes, name)
+    return matches[0] if matches else None
 
 
 def _format_review(review: dict, index: int) -> str:
@@ -217,8 +403,7 @@ def _format_review(review: dict, index: int) -> str:
     thumbs_down = review.get("thumbsDownTotal", 0)
 
     # Trim the UTC timezone suffix for cleaner display
-    if r_date and " +0000 UTC" in r_date:
-        r_date = r_date.replace(" +0000 UTC", "")
+    r_date = (r_date or "").removesuffix(" +0000 UTC")
 
     meta = []
     if r_class:
@@ -242,9 +427,7 @@ def _format_review(review: dict, index: int) -> str:
     if tags:
         lines.append(f"     Tags: {tags}")
     if comment:
-        if len(comment) > 500:
-            comment = comment[:497] + "..."
-        lines.append(f"     \"{comment}\"")
+        lines.append(f"     \"{truncate(comment, 500)}\"")
     if thumbs_up or thumbs_down:
         lines.append(f"     Helpful: {thumbs_up} up / {thumbs_down} down")
 
@@ -284,8 +467,8 @@ def _format_professor(node: dict) -> str:
     # Top rating tags
     tags = node.get("teacherRatingTags", [])
     if tags:
-        sorted_tags = sorted(tags, key=lambda t: t.get("tagCount", 0), reverse=True)
-        top_tags = [t["tagName"] for t in sorted_tags[:5] if t.get("tagCount", 0) > 0]
+        top_five = heapq.nlargest(5, tags, key=lambda t: t.get("tagCount", 0))
+        top_tags = [t["tagName"] for t in top_five if t.get("tagCount", 0) > 0]
         if top_tags:
             lines.append(f"  Top Tags: {', '.join(top_tags)}")
 
@@ -318,10 +501,7 @@ def _format_professor(node: dict) -> str:
         if r_date:
             lines.append(f"    Date: {r_date}")
         if comment:
-            # Truncate very long comments
-            if len(comment) > 400:
-                comment = comment[:397] + "..."
-            lines.append(f"    \"{comment}\"")
+            lines.append(f"    \"{truncate(comment, 400)}\"")
 
     if legacy_id:
         lines.append(f"  RMP Link: https://www.ratemyprofessors.com/professor/{legacy_id}")
@@ -329,26 +509,14 @@ def _format_professor(node: dict) -> str:
     return "\n".join(lines)
 
 
-# ---------------------------------------------------------------------------
-# LangChain Tool
-# ---------------------------------------------------------------------------
+def _summarize_matches(professor_name: str, nodes: list[dict], prefetch: bool = True) -> str:
+    """Format search results for one name as returned by the rating tools.
 
-@tool
-def search_professor_rating(professor_name: str) -> str:
-    """Look up a professor's rating on RateMyProfessors for the University of Florida.
-
-    Use this tool when a student asks about a professor's rating, reviews,
-    difficulty, or reputation. Provide the professor's full name as it appears
-    in the course catalog (e.g. "Amanpreet Kapoor").
-
-    Args:
-        professor_name: The professor's full name (e.g. "Amanpreet Kapoor").
+    With *prefetch*, the shown professors' reviews are fetched in the
+    background.  The batch tool turns it off: a comparison of several
+    professors rarely leads to a reviews call for each of them.
     """
     name = professor_name.strip()
-    if not name:
-        return "Please provide a professor name to search."
-
-    nodes = _fetch_professor(name)
 
     # Handle request errors
     if nodes and "_error" in nodes[0]:
@@ -360,18 +528,8 @@ def search_professor_rating(professor_name: str) -> str:
             "The professor may not have a profile, or try a different name spelling."
         )
 
-    # Filter to UF professors with ratings, and try exact name match first
-    name_lower = name.lower()
-    uf_matches = []
-    for node in nodes:
-        full = f"{node.get('firstName', '')} {node.get('lastName', '')}".strip().lower()
-        num_ratings = node.get("numRatings", 0)
-        if num_ratings > 0 and full == name_lower:
-            uf_matches.append(node)
-
-    # If no exact match, show all UF results that have ratings
-    if not uf_matches:
-        uf_matches = [n for n in nodes if n.get("numRatings", 0) > 0]
+    # UF professors with ratings, exact name matches first
+    uf_matches = _rated_matches(nodes, name)
 
     if not uf_matches:
         return (
@@ -379,6 +537,11 @@ def search_professor_rating(professor_name: str) -> str:
             "they have no ratings yet."
         )
 
+    if prefetch and not _CACHE_DISABLED:
+        for match in uf_matches[:3]:
+            if match.get("id"):
+                _EXECUTOR.submit(_fetch_ratings, match["id"], _PREFETCH_REVIEWS)
+
     formatted = [_format_professor(m) for m in uf_matches[:3]]
 
     if len(uf_matches) == 1:
@@ -389,6 +552,66 @@ def search_professor_rating(professor_name: str) -> str:
     return header + separator.join(formatted)
 
 
+# ---------------------------------------------------------------------------
+# LangChain Tool
+# ---------------------------------------------------------------------------
+
+@tool
+def search_professor_rating(professor_name: str) -> str:
+    """Look up a professor's rating on RateMyProfessors for the University of Florida.
+
+    Use this tool when a student asks about a professor's rating, reviews,
+    difficulty, or reputation. Provide the professor's full name as it appears
+    in the course catalog (e.g. "Amanpreet Kapoor").
+
+    Args:
+        professor_name: The professor's full name (e.g. "Amanpreet Kapoor").
+    """
+    name = professor_name.strip()
+    if not name:
+        return "Please provide a professor name to search."
+
+    return _summarize_matches(professor_name, _fetch_professor(name))
+
+
+@tool
+def search_professor_ratings(professor_names: list[str]) -> str:
+    """Look up ratings for several UF professors at once on RateMyProfessors.
+
+    Use this instead of repeated search_professor_rating calls when a student
+    wants to compare professors (e.g. the instructors of different sections).
+    All names are looked up in a single request.
+
+    Args:
+        professor_names: Up to 5 full names (e.g. ["Amanpreet Kapoor",
+                         "Jeremiah Blanchard"]).
+    """
+    # De-duplicate case-insensitively, keeping the first spelling given
+    by_key = {}
+    for n in professor_names:
+        n = n.strip()
+        if n:
+            by_key.setdefault(n.lower(), n)
+    names = list(by_key.values())
+    if not names:
+        return "Please provide at least one professor name to search."
+
+    skipped = names[_MAX_BATCH_NAMES:]
+    names = names[:_MAX_BATCH_NAMES]
+    results = _fetch_professors(names)
+
+    separator = "\n" + "=" * 60 + "\n"
+    output = separator.join(
+        _summarize_matches(name, results[name], prefetch=False) for name in names
+    )
+    if skipped:
+        output += (
+            f"\n\nOnly the first {_MAX_BATCH_NAMES} names were looked up; "
+            f"not searched: {', '.join(skipped)}."
+        )
+    return output
+
+
 @tool
 def get_professor_reviews(professor_name: str, num_reviews: int = 5) -> str:
     """Get the most recent student reviews for a UF professor from RateMyProfessors.
@@ -6,19 +6,21 @@ Usage:
 """
 
 import os
-from threading import Thread
+import time
+from collections import OrderedDict
+from threading import Lock
 
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.agents import create_agent
+from langchain_core.messages import AIMessageChunk
 from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import VerticalScroll
 from textual.widgets import Footer, Header, Input, Markdown, Static
 
+from tools.course_data import CACHE_TTL
 from tools.course_search import search_courses_by_code, search_courses_by_title, get_course_sections
-from tools.rmp_search import search_professor_rating, get_professor_reviews
+from tools.rmp_search import search_professor_rating, search_professor_ratings, get_professor_reviews
 
 load_dotenv()
 
@@ -35,6 +37,7 @@ You are a friendly and knowledgeable course assistant for University of Florida
 3. **get_course_sections**: Retrieve full section details for a specific course code, including instructors, schedules, locations, and delivery modality. Use after identifying the correct course.
 4. **search_professor_rating**: Look up a professor's overall rating, difficulty, and top review from RateMyProfessors. Use the professor's full name as listed in the course section data (e.g., "Amanpreet Kapoor").
 5. **get_professor_reviews**: Retrieve the most recent student reviews for a professor. Use when detailed or multiple recent reviews are requested, or when current student opinions are relevant.
+6. **search_professor_ratings**: Look up ratings for up to five professors in a single request. Use instead of several **search_professor_rating** calls when comparing professors.
 
 Use only tools listed above. For routine, read-only tasks, call tools automatically; for any updates that could modify student data (if any are supported in future), seek explicit confirmation before proceeding.
 
@@ -43,7 +46,8 @@ Use only tools listed above. For routine, read-only tasks, call tools automatica
 - Before any significant tool call, state the purpose and minimal inputs used.
 - After retrieving information or completing a tool-based step, validate that key student questions have been addressed, and either proceed or self-correct if validation fails or information is incomplete.
 - Use **search_professor_rating** for quick overview of a professor's reputation and **get_professor_reviews** for more detailed or recent feedback.
-- When a student is deciding between sections, proactively check professor ratings to assist their decision.
+- When a student is deciding between sections, proactively check professor ratings to assist their decision (**search_professor_ratings** fetches all of the instructors at once).
+- When several lookups are independent (e.g., details for two courses), request those tool calls together in the same step so they run in parallel.
 - Summarize key details in responses. Present information clearly and concisely rather than copying raw data.
 - If a course code has multiple listings (e.g., Special Topics with different subtitles), mention all of them so the student can pick the right one.
 - Assist students in comparing sections for scheduling conflicts or when choosing between options.
@@ -52,6 +56,21 @@ Use only tools listed above. For routine, read-only tasks, call tools automatica
 - Be concise yet thorough—students are busy, so get to the point while ensuring all relevant information is provided.
 """
 
+# Kept static so it stays a cacheable prefix (see chat.py).
+PROMPT_CACHE_KEY = "uf-course-assistant"
+
+# Exact-match reply cache keyed by the normalized question, so repeating a
+# question (common in demos) skips the agent run.  Only replies to the
+# opening question of a conversation are stored: they cannot depend on
+# earlier turns, unlike follow-ups such as "what about section 2?".  Each
+# new conversation (ctrl+n) can add one.  Replies expire with the course
+# data they were built from.
+_REPLY_CACHE_SIZE = 64
+
+# Streamed tokens are pushed to the UI in batches at most this often, so the
+# Markdown bubble re-renders a few times a second rather than per token.
+_STREAM_FLUSH_INTERVAL = 0.05  # seconds
+
 # ---------------------------------------------------------------------------
 # Stylesheet
 # ---------------------------------------------------------------------------
@@ -92,11 +111,9 @@ Screen {
     text-style: italic;
 }
 
-.msg-label {
-    color: $text-muted;
-    text-style: bold;
-    margin: 1 0 0 0;
-    padding: 0 2;
+.user-msg, .assistant-msg {
+    border-title-color: $text-muted;
+    border-title-style: bold;
 }
 
 #input-bar {
@@ -133,60 +150,99 @@ class UFCourseAssistant(App):
 
     BINDINGS = [
         Binding("ctrl+q", "quit", "Quit", show=True),
+        Binding("ctrl+n", "new_conversation", "New chat", show=True),
         Binding("escape", "quit", "Quit", show=False),
     ]
 
     def __init__(self):
         super().__init__()
         self.conversation_history: list[dict] = []
+        # Appended from the event loop and from worker threads; workers pass
+        # the agent a snapshot so the list never changes under it.
+        self._history_lock = Lock()
         self.agent = None
         self._thinking_widget = None
+        self._stream_bubble: Markdown | None = None
+        self._reply_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
 
     def compose(self) -> ComposeResult:
-        yield Header()
-        with VerticalScroll(id="chat-view"):
-            yield Static(
-                "Welcome! Ask me anything about UF courses, sections, "
-                "schedules, or professor ratings.",
-                classes="assistant-msg",
-            )
-        yield Input(
+        # Keep references to the widgets used on every turn instead of
+        # querying the DOM for them each time.
+        self._chat_view = VerticalScroll(id="chat-view")
+        self._input = Input(
             placeholder="Ask about courses, sections, or professors...",
             id="user-input",
         )
+
+        yield Header()
+        with self._chat_view:
+            yield self._welcome_message()
+        yield self._input
         yield Footer()
 
+    @staticmethod
+    def _welcome_message() -> Static:
+        return Static(
+            "Welcome! Ask me anything about UF courses, sections, "
+            "schedules, or professor ratings.",
+            classes="assistant-msg",
+        )
+
     def on_mount(self) -> None:
-        self.query_one("#user-input", Input).focus()
+        self._input.focus()
         self._build_agent()
 
     @work(thread=True)
     def _build_agent(self) -> None:
+        # Imported here, in the worker, so the UI paints before the OpenAI
+        # client and LangGraph finish loading.
+        from langchain.agents import create_agent
+        from langchain_openai import ChatOpenAI
+
         llm = ChatOpenAI(
             model="gpt-5-mini-2025-08-07",
             api_key=os.environ.get("OPENAI_API_KEY"),
+            model_kwargs={"prompt_cache_key": PROMPT_CACHE_KEY},
         )
-        tools = [search_courses_by_code, search_courses_by_title, get_course_sections, search_professor_rating, get_professor_reviews]
+        tools = [search_courses_by_code, search_courses_by_title, get_course_sections, search_professor_rating, search_professor_ratings, get_professor_reviews]
         self.agent = create_agent(
             model=llm,
             tools=tools,
             system_prompt=SYSTEM_PROMPT,
         )
 
+        # Open the connection to the API now so the first question doesn't
+        # pay for DNS + TLS.  A model lookup shares the chat client's pool
+        # and spends no tokens; failures surface on the first real call.
+        try:
+            llm.root_client.models.retrieve(llm.model_name)
+        except Exception:
+            pass
+
+    async def action_new_conversation(self) -> None:
+        """Clear the chat and history; cached opening replies are kept."""
+        if self._input.disabled:
+            return  # a reply is still streaming into the current chat
+        with self._history_lock:
+            self.conversation_history.clear()
+        await self._chat_view.remove_children()
+        await self._chat_view.mount(self._welcome_message())
+        self._input.focus()
+
     async def on_input_submitted(self, event: Input.Submitted) -> None:
         user_text = event.value.strip()
         if not user_text:
             return
 
-        input_widget = self.query_one("#user-input", Input)
+        input_widget = self._input
         input_widget.value = ""
 
-        chat = self.query_one("#chat-view", VerticalScroll)
+        chat = self._chat_view
 
-        # User bubble
-        user_label = Static("You", classes="msg-label")
+        # User bubble (the speaker goes in the border title rather than a
+        # separate label widget, keeping the chat's widget count down)
         user_bubble = Static(user_text, classes="user-msg")
-        await chat.mount(user_label)
+        user_bubble.border_title = "You"
         await chat.mount(user_bubble)
 
         # Thinking indicator
@@ -196,7 +252,8 @@ class UFCourseAssistant(App):
 
         input_widget.disabled = True
 
-        self.conversation_history.append({"role": "user", "content": user_text})
+        with self._history_lock:
+            self.conversation_history.append({"role": "user", "content": user_text})
         self._get_response(user_text)
 
     @work(thread=True)
@@ -205,18 +262,67 @@ class UFCourseAssistant(App):
             self.app.call_from_thread(self._show_response, "Agent is still loading, please wait a moment...")
             return
 
-        try:
-            response = self.agent.invoke({"messages": self.conversation_history})
-            assistant_message = response["messages"][-1]
-            assistant_text = assistant_message.content
-        except Exception as e:
-            assistant_text = f"Error: {e}"
-
-        self.conversation_history.append({"role": "assistant", "content": assistant_text})
+        with self._history_lock:
+            messages = list(self.conversation_history)
+
+        key = " ".join(user_text.lower().split())
+        hit = self._reply_cache.get(key)
+        if hit is not None and time.time() - hit[0] < CACHE_TTL:
+            self._reply_cache.move_to_end(key)
+            assistant_text = hit[1]
+        else:
+            try:
+                assistant_text = self._stream_reply(messages)
+            except Exception as e:
+                assistant_text = f"Error: {e}"
+            else:
+                if len(messages) == 1:
+                    self._reply_cache[key] = (time.time(), assistant_text)
+                    self._reply_cache.move_to_end(key)
+                    if len(self._reply_cache) > _REPLY_CACHE_SIZE:
+                        self._reply_cache.popitem(last=False)
+
+        with self._history_lock:
+            self.conversation_history.append({"role": "assistant", "content": assistant_text})
         self.app.call_from_thread(self._show_response, assistant_text)
 
-    def _show_response(self, text: str) -> None:
-        chat = self.query_one("#chat-view", VerticalScroll)
+    def _stream_reply(self, messages: list[dict]) -> str:
+        """Stream the agent's answer into the chat and return the full text.
+
+        Runs in the worker thread.  Only the model node's text is shown; if
+        the model speaks before a tool call, the final answer replaces it.
+        """
+        parts: list[str] = []
+        pending: list[str] = []
+        replace = False
+        message_id = None
+        last_flush = time.monotonic()
+
+        for chunk, metadata in self.agent.stream({"messages": messages}, stream_mode="messages"):
+            if metadata.get("langgraph_node") != "model" or not isinstance(chunk, AIMessageChunk):
+                continue
+            if chunk.id != message_id:
+                message_id = chunk.id
+                if parts:
+                    replace = True
+                parts, pending = [], []
+            token = chunk.text
+            if not token:
+                continue
+            parts.append(token)
+            pending.append(token)
+            now = time.monotonic()
+            if now - last_flush >= _STREAM_FLUSH_INTERVAL:
+                self.app.call_from_thread(self._stream_append, "".join(pending), replace)
+                pending = []
+                replace = False
+                last_flush = now
+
+        # Anything still pending is rendered by _show_response.
+        return "".join(parts)
+
+    def _mount_assistant_bubble(self, text: str) -> Markdown:
+        chat = self._chat_view
 
         # Remove thinking indicator
         if self._thinking_widget is not None:
@@ -224,14 +330,32 @@ class UFCourseAssistant(App):
             self._thinking_widget = None
 
         # Assistant bubble
-        label = Static("Assistant", classes="msg-label")
         bubble = Markdown(text, classes="assistant-msg")
-        chat.mount(label)
+        bubble.border_title = "Assistant"
         chat.mount(bubble)
         chat.scroll_end(animate=False)
+        return bubble
+
+    def _stream_append(self, fragment: str, replace: bool) -> None:
+        if self._stream_bubble is None:
+            self._stream_bubble = self._mount_assistant_bubble(fragment)
+            return
+        if replace:
+            self._stream_bubble.update(fragment)
+        else:
+            self._stream_bubble.append(fragment)
+        self._chat_view.scroll_end(animate=False)
 
-        self.query_one("#user-input", Input).disabled = False
-        self.query_one("#user-input", Input).focus()
+    def _show_response(self, text: str) -> None:
+        if self._stream_bubble is None:
+            self._mount_assistant_bubble(text)
+        else:
+            self._stream_bubble.update(text)
+            self._stream_bubble = None
+            self._chat_view.scroll_end(animate=False)
+
+        self._input.disabled = False
+        self._input.focus()
 
 
 if __name__ == "__main__":